@@ -240,7 +240,8 @@ def load_timing_config(account_mgr: AccountManager) -> TimingConfig:
         action_delay_max=timing.get("action_delay_max", 1500),
         autocomplete_wait=timing.get("autocomplete_wait", 3.0),
         command_submit_wait=timing.get("command_submit_wait", 4.0),
-        bot_response_timeout=timing.get("bot_response_timeout", 8.0)
+        bot_response_timeout=timing.get("bot_response_timeout", 8.0),
+        human_grain=timing.get("human_grain", "burst")
     )
 
 
@@ -1224,6 +1225,9 @@ async def main_async(args) -> None:
     finally:
         await shutdown_handler.cleanup()
         
+        if state_mgr:
+            state_mgr.close()
+        
         if state_mgr and (args.mode == "smart" or not args.mode):
             state_mgr.print_progress_report()
         
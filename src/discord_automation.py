@@ -8,14 +8,20 @@ import os
 import random
 import time
 from dataclasses import dataclass, field
-from datetime import datetime
 from typing import Optional, List, Tuple
 
+try:
+    from asyncio import timeout as async_timeout  # Python 3.11+
+except ImportError:
+    from async_timeout import timeout as async_timeout
+
 try:
     from patchright.async_api import async_playwright, Page, Browser, BrowserContext, Locator
+    from patchright.async_api import TimeoutError as PlaywrightTimeoutError
     PATCHRIGHT_AVAILABLE = True
 except ImportError:
     PATCHRIGHT_AVAILABLE = False
+    PlaywrightTimeoutError = asyncio.TimeoutError
     Page = None
     Browser = None
     BrowserContext = None
@@ -36,6 +42,7 @@ class TimingConfig:
     autocomplete_wait: float = 2.0
     command_submit_wait: float = 3.0
     bot_response_timeout: float = 5.0
+    human_grain: str = "burst"  # "burst" (2-5 chars per CDP call) or "char"
 
 
 @dataclass
@@ -101,6 +108,15 @@ class DiscordSelectors:
     
     # Chat messages
     messages: str = '[id^="chat-messages-"]'
+    
+    def __post_init__(self) -> None:
+        """Pre-join selector lists into CSS unions (lists are treated as immutable)."""
+        self.app_css = ",".join(self.app)
+        self.channel_content_css = ",".join(self.channel_content)
+        self.message_input_css = ",".join(self.message_input)
+        self.autocomplete_css = ",".join(self.autocomplete)
+        self.logged_in_css = ",".join(self.logged_in)
+        self.errors_css = ",".join(self.errors)
 
 
 # ============================================================================
@@ -110,6 +126,42 @@ class DiscordSelectors:
 class DiscordAutomation:
     """Automates Discord interactions using Patchright (stealth Playwright)"""
     
+    SCREENSHOTS_DIR = "screenshots"
+    
+    # Keywords that mark a cooldown / rate-limit / failure notice (JS RegExp source, matched case-insensitively in-page)
+    _ERROR_PATTERN = "cooldown|wait|error|failed|limit"
+    
+    # Raw CDP Input.dispatchKeyEvent parameters for keys pressed on the hot path
+    _KEY_EVENTS = {
+        "Enter": {"key": "Enter", "code": "Enter", "windowsVirtualKeyCode": 13, "text": "\r"},
+        "Backspace": {"key": "Backspace", "code": "Backspace", "windowsVirtualKeyCode": 8},
+        "Control+a": {"key": "a", "code": "KeyA", "windowsVirtualKeyCode": 65, "modifiers": 2,
+                      "commands": ["selectAll"]},
+    }
+    _screenshots_dir_ready = False
+    
+    # In-page probe: [union, selectors, needVisible] -> first selector (list order) with a match
+    _PROBE_JS = """([union, sels, needVisible]) => {
+        if (!document.querySelector(union)) return null;
+        const visible = (el) => {
+            const r = el.getBoundingClientRect();
+            return r.width > 0 && r.height > 0 && getComputedStyle(el).visibility !== 'hidden';
+        };
+        for (const s of sels) {
+            for (const el of document.querySelectorAll(s)) {
+                if (!needVisible || visible(el)) return s;
+            }
+        }
+        return null;
+    }"""
+    
+    # In-page check: {sel, text} -> true once a popup's first option (what Enter picks) shows the typed text
+    _AUTOCOMPLETE_JS = """({sel, text}) => {
+        const popups = [...document.querySelectorAll(sel)].filter(e => e.childElementCount > 0);
+        const first = popups.map(p => p.querySelector('[role="option"]')).find(o => o);
+        return (first ? [first] : popups).some(e => (e.textContent || '').toLowerCase().includes(text));
+    }"""
+    
     def __init__(
         self, 
         cdp_url: str, 
@@ -133,13 +185,23 @@ class DiscordAutomation:
         self.timing = timing or TimingConfig()
         self.selectors = selectors or DiscordSelectors()
         self.logger = logger or logging.getLogger(__name__)
+        # Печатаем сами только если логгер никуда не выводит (иначе строки дублируются)
+        self._print_to_console = not self.logger.hasHandlers()
+        
+        # Create screenshots directory once instead of on every capture
+        if not DiscordAutomation._screenshots_dir_ready:
+            os.makedirs(self.SCREENSHOTS_DIR, exist_ok=True)
+            DiscordAutomation._screenshots_dir_ready = True
         
         # Browser state
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
         self.playwright = None
+        self._cdp = None
+        self._is_dm_cache: Optional[bool] = None
         self._connected = False
+        self._close_lock = asyncio.Lock()
     
     # ========================================================================
     # CONTEXT MANAGER
@@ -193,6 +255,16 @@ class DiscordAutomation:
                 self.page = await self.context.new_page()
                 self._log("  ✓ Created new context and page")
             
+            # Invalidate cached channel type whenever the main frame navigates
+            self.page.on("framenavigated", self._on_frame_navigated)
+            
+            # Persistent CDP session for batched input
+            try:
+                self._cdp = await self.context.new_cdp_session(self.page)
+            except Exception as e:
+                self._cdp = None
+                self._log(f"  ⚠️ CDP session unavailable, using keyboard API: {e}", level="warning")
+            
             self._connected = True
             self._log("✅ Connected to browser via Patchright (stealth mode active)")
             self._log("🥷 Anti-detection: navigator.webdriver = undefined")
@@ -205,36 +277,38 @@ class DiscordAutomation:
     
     async def close(self, timeout: float = 10.0) -> None:
         """Close the browser connection (AdsPower manages browser lifecycle)."""
-        try:
-            if self.browser:
-                try:
-                    # Добавляем таймаут на закрытие браузера
-                    await asyncio.wait_for(
-                        self.browser.close(),
-                        timeout=timeout
-                    )
-                except asyncio.TimeoutError:
-                    self._log(f"⚠️ Browser close timed out after {timeout}s, forcing disconnect", level="warning")
-                except Exception as e:
-                    self._log(f"⚠️ Error disconnecting browser: {e}", level="warning")
+        async with self._close_lock:
+            if self.browser is None and self.playwright is None:
+                return  # Already closed
             
-            if self.playwright:
-                try:
-                    await asyncio.wait_for(
-                        self.playwright.stop(),
-                        timeout=5.0
-                    )
-                except asyncio.TimeoutError:
-                    self._log("⚠️ Playwright stop timed out", level="warning")
-                except Exception:
-                    pass
+            try:
+                # Браузер отключается через драйвер Playwright - сначала браузер, потом драйвер
+                async with async_timeout(timeout):
+                    await self._close_browser()
+                    await self._stop_playwright()
+            except asyncio.TimeoutError:
+                self._log(f"⚠️ Browser shutdown timed out after {timeout}s, forcing disconnect", level="warning")
+            except Exception as e:
+                self._log(f"⚠️ Error closing browser: {e}", level="warning")
             
             self._reset_state()
             self._log("✅ Browser connection closed")
-            
-        except Exception as e:
-            self._log(f"⚠️ Error closing browser: {e}", level="warning")
-            self._reset_state()
+    
+    async def _close_browser(self) -> None:
+        """Disconnect from the browser."""
+        if self.browser:
+            try:
+                await self.browser.close()
+            except Exception as e:
+                self._log(f"⚠️ Error disconnecting browser: {e}", level="warning")
+    
+    async def _stop_playwright(self) -> None:
+        """Stop the Playwright driver."""
+        if self.playwright:
+            try:
+                await self.playwright.stop()
+            except Exception:
+                pass
     
     def _reset_state(self) -> None:
         """Reset internal state."""
@@ -242,8 +316,15 @@ class DiscordAutomation:
         self.context = None
         self.page = None
         self.playwright = None
+        self._cdp = None
+        self._is_dm_cache = None
         self._connected = False
     
+    def _on_frame_navigated(self, frame) -> None:
+        """Drop cached URL-derived state when the main frame navigates."""
+        if self.page is not None and frame == self.page.main_frame:
+            self._is_dm_cache = None
+    
     # ========================================================================
     # SELECTOR HELPERS
     # ========================================================================
@@ -251,105 +332,127 @@ class DiscordAutomation:
     async def _find_element(
         self, 
         selectors: List[str], 
+        union: str,
         timeout: int = 8000,
         state: str = "visible"
     ) -> Tuple[Optional[Locator], Optional[str]]:
         """
-        Try to find an element using multiple selectors.
+        Find an element matching any of the given selectors, in list priority order.
+        
+        A single in-page probe walks the selectors in order (the CSS union is only
+        a cheap "anything there yet?" gate), so a broad fallback selector never
+        wins over a more specific one earlier in the list.
         
         Args:
-            selectors: List of CSS selectors to try
-            timeout: Timeout per selector in milliseconds
-            state: Element state to wait for
+            selectors: List of CSS selectors to try, most specific first
+            union: The same selectors joined into one CSS union (DiscordSelectors.*_css)
+            timeout: Total timeout in milliseconds
+            state: Element state to wait for ("visible" or "attached")
             
         Returns:
             Tuple of (locator, matched_selector) or (None, None)
         """
-        for selector in selectors:
-            try:
-                locator = self.page.locator(selector).first
-                await locator.wait_for(state=state, timeout=timeout)
-                return locator, selector
-            except Exception:
-                continue
-        return None, None
+        matched = await self._probe_selectors(selectors, union, timeout, state == "visible")
+        if not matched:
+            return None, None
+        locator = self.page.locator(f"{matched} >> visible=true" if state == "visible" else matched)
+        return locator.first, matched
     
     async def _wait_for_any_selector(
         self, 
         selectors: List[str], 
+        union: str,
         timeout: int = 8000
     ) -> Optional[str]:
         """
-        Wait for any of the given selectors to appear.
+        Wait for any of the given selectors to appear (visible).
         
         Args:
-            selectors: List of CSS selectors to try
-            timeout: Timeout per selector in milliseconds
+            selectors: List of CSS selectors to try, most specific first
+            union: The same selectors joined into one CSS union (DiscordSelectors.*_css)
+            timeout: Total timeout in milliseconds
             
         Returns:
-            Matched selector or None
-        """
-        for selector in selectors:
-            try:
-                await self.page.wait_for_selector(selector, timeout=timeout)
-                return selector
-            except Exception:
-                continue
-        return None
-    
-    async def _query_any_selector(self, selectors: List[str]) -> Tuple[Optional[any], Optional[str]]:
-        """
-        Query for any of the given selectors.
-        
-        Returns:
-            Tuple of (element, matched_selector) or (None, None)
+            First matched selector in list order, or None
         """
-        for selector in selectors:
-            try:
-                elem = await self.page.query_selector(selector)
-                if elem:
-                    return elem, selector
-            except Exception:
-                continue
-        return None, None
+        return await self._probe_selectors(selectors, union, timeout, True)
+    
+    async def _probe_selectors(
+        self,
+        selectors: List[str],
+        union: str,
+        timeout: int,
+        need_visible: bool
+    ) -> Optional[str]:
+        """Wait until some selector matches; return the first one in list order."""
+        try:
+            handle = await self.page.wait_for_function(
+                self._PROBE_JS,
+                arg=[union, selectors, need_visible],
+                timeout=timeout
+            )
+            return await handle.json_value()
+        except Exception:
+            return None
     
     # ========================================================================
     # HUMAN-LIKE BEHAVIOR
     # ========================================================================
     
     async def _human_type(self, text: str) -> None:
-        """Type text with human-like delays."""
+        """Type text with human-like delays, in short bursts via CDP when available."""
         if not self.page:
             raise RuntimeError("Not connected to browser")
         
-        for char in text:
-            await self.page.keyboard.type(char)
-            delay = random.randint(
-                self.timing.typing_delay_min, 
-                self.timing.typing_delay_max
-            ) / 1000
-            await asyncio.sleep(delay)
-    
-    async def _random_delay(self, min_ms: Optional[int] = None, max_ms: Optional[int] = None) -> None:
-        """Add random delay to simulate human behavior."""
-        min_ms = min_ms or self.timing.action_delay_min
-        max_ms = max_ms or self.timing.action_delay_max
-        delay = random.randint(min_ms, max_ms) / 1000
-        await asyncio.sleep(delay)
+        # Draw all per-character delays up front
+        low = self.timing.typing_delay_min / 1000
+        high = self.timing.typing_delay_max / 1000
+        uniform = random.uniform
+        delays = [uniform(low, high) for _ in text]
+        
+        if self._cdp is None or self.timing.human_grain == "char":
+            for char, delay in zip(text, delays):
+                await self.page.keyboard.type(char)
+                await asyncio.sleep(delay)
+            return
+        
+        pos = 0
+        while pos < len(text):
+            end = pos + random.randint(2, 5)
+            await self._cdp.send("Input.insertText", {"text": text[pos:end]})
+            await asyncio.sleep(sum(delays[pos:end]))
+            pos = end
+    
+    @staticmethod
+    async def _sleep_between(min_ms: float, max_ms: float) -> None:
+        """Sleep for a uniformly random duration between min_ms and max_ms."""
+        await asyncio.sleep((random.random() * (max_ms - min_ms) + min_ms) / 1000.0)
+    
+    async def _press(self, key: str) -> None:
+        """Press a key via the persistent CDP session (falls back to keyboard API)."""
+        params = self._KEY_EVENTS.get(key)
+        if self._cdp is None or params is None:
+            await self.page.keyboard.press(key)
+            return
+        
+        down_type = "keyDown" if "text" in params else "rawKeyDown"
+        await self._cdp.send("Input.dispatchKeyEvent", {"type": down_type, **params})
+        up_params = {k: v for k, v in params.items() if k not in ("text", "commands")}
+        await self._cdp.send("Input.dispatchKeyEvent", {"type": "keyUp", **up_params})
     
     async def _clear_input(self) -> None:
         """Clear current input field using Ctrl+A, Backspace."""
         if self.page:
-            await self.page.keyboard.press("Control+a")
+            await self._press("Control+a")
             await asyncio.sleep(0.1)
-            await self.page.keyboard.press("Backspace")
+            await self._press("Backspace")
     
     # ========================================================================
     # DISCORD STATE CHECKS
     # ========================================================================
     
     async def verify_discord_login(self) -> bool:
-        """Verify that Discord is logged in."""
+        """Verify that Discord is logged in (single in-page evaluation)."""
         try:
             self._ensure_connected()
             
@@ -358,22 +461,45 @@ class DiscordAutomation:
                 self._log("  ❌ Not logged in - on login/register page")
                 return False
             
-            elem, selector = await self._query_any_selector(self.selectors.logged_in)
-            if elem:
-                self._log(f"  ✓ Discord logged in (found: {selector})")
+            # Сразу после подключения страница может ещё навигировать и evaluate падает
+            # ("Execution context was destroyed") - ждём загрузку и пробуем ещё раз
+            state = None
+            for attempt in range(2):
+                try:
+                    state = await self.page.evaluate(
+                        """({sel, sels}) => ({
+                            loggedIn: document.querySelector(sel)
+                                ? (sels.find(s => document.querySelector(s)) || sel)
+                                : null,
+                            hasLoginForm: !!document.querySelector('input[type="email"], input[name="email"]')
+                        })""",
+                        {"sel": self.selectors.logged_in_css, "sels": self.selectors.logged_in}
+                    )
+                    break
+                except Exception as e:
+                    if attempt:
+                        # Не смогли проверить - это не признак неавторизованности
+                        self._log(f"  ⚠️ Could not verify Discord login state: {e}", level="warning")
+                        return True
+                    try:
+                        await self.page.wait_for_load_state("domcontentloaded", timeout=5000)
+                    except Exception:
+                        pass
+                    current_url = self.page.url
+                    if "/login" in current_url or "/register" in current_url:
+                        self._log("  ❌ Not logged in - redirected to login/register page")
+                        return False
+            
+            if state["loggedIn"]:
+                self._log(f"  ✓ Discord logged in (found: {state['loggedIn']})")
                 return True
             
             # Если не можем проверить, проверяем наличие элементов, указывающих на неавторизованность
             self._log("  ⚠️ Could not verify Discord login state")
             
-            # Дополнительная проверка: ищем элементы, указывающие на страницу входа
-            try:
-                login_elements = await self.page.query_selector_all('input[type="email"], input[name="email"]')
-                if login_elements:
-                    self._log("  ❌ Found login form elements - likely not logged in")
-                    return False
-            except Exception:
-                pass
+            if state["hasLoginForm"]:
+                self._log("  ❌ Found login form elements - likely not logged in")
+                return False
             
             # Если URL не содержит /login и нет элементов входа, но и нет подтверждения авторизации,
             # считаем что авторизован (может быть медленная загрузка)
@@ -384,57 +510,74 @@ class DiscordAutomation:
             return False
     
     async def _check_channel_access(self) -> Optional[str]:
-        """Check for Discord access issues."""
+        """Check for Discord access issues (single in-page evaluation)."""
         try:
+            probes = []
             for selector in self.selectors.access_issues:
-                try:
-                    elem = await self.page.query_selector(selector)
-                    if elem:
-                        text = await elem.text_content()
-                        if text:
-                            return text.strip()[:100]
-                except Exception:
-                    continue
-            return None
+                if selector.startswith("text="):
+                    probes.append({"text": selector[5:].strip('"')})
+                else:
+                    probes.append({"css": selector})
+            
+            text = await self.page.evaluate(
+                """(probes) => {
+                    for (const p of probes) {
+                        if (p.text !== undefined) {
+                            // Same as Playwright text="...": an element whose own text is exactly p.text
+                            const body = document.body;
+                            if (!body || !body.textContent.includes(p.text)) continue;
+                            for (const el of body.querySelectorAll('*')) {
+                                if ((el.textContent || '').replace(/\s+/g, ' ').trim() === p.text) return p.text;
+                            }
+                            continue;
+                        }
+                        let el = null;
+                        try { el = document.querySelector(p.css); } catch (e) { continue; }
+                        const t = el ? (el.textContent || '').trim() : '';
+                        if (t) return t;
+                    }
+                    return null;
+                }""",
+                probes
+            )
+            return text[:100] if text else None
         except Exception:
             return None
     
     async def _check_for_error_message(self) -> Optional[str]:
         """Check for error messages (cooldown, rate limit, etc.)."""
         try:
-            error_keywords = ['cooldown', 'wait', 'error', 'failed', 'limit']
-            
-            for selector in self.selectors.errors:
-                elements = await self.page.query_selector_all(selector)
-                for elem in elements:
-                    text = await elem.text_content()
-                    if text and any(word in text.lower() for word in error_keywords):
-                        return text.strip()
-            return None
+            # One in-page pass over all error elements with a single RegExp
+            return await self.page.evaluate(
+                """({sel, pattern}) => {
+                    const re = new RegExp(pattern, 'i');
+                    for (const el of document.querySelectorAll(sel)) {
+                        const t = (el.textContent || '').trim();
+                        if (t && re.test(t)) return t;
+                    }
+                    return null;
+                }""",
+                {"sel": self.selectors.errors_css, "pattern": self._ERROR_PATTERN}
+            )
         except Exception:
             return None
     
     async def _get_last_message_id(self) -> Optional[str]:
         """Get the ID of the last message in chat."""
         try:
-            messages = await self.page.query_selector_all(self.selectors.messages)
-            if messages:
-                return await messages[-1].get_attribute("id")
-            return None
+            return await self.page.evaluate(
+                "sel => { const m = document.querySelectorAll(sel); return m.length ? m[m.length - 1].id : null; }",
+                self.selectors.messages
+            )
         except Exception:
             return None
     
     async def _wait_for_bot_response(self, before_message_id: Optional[str], timeout: float = 5.0) -> bool:
         """Wait for a new message to appear after command submission."""
         try:
-            start_time = time.monotonic()
-            
-            while time.monotonic() - start_time < timeout:
-                current_id = await self._get_last_message_id()
-                if current_id and current_id != before_message_id:
-                    self._log("  ✓ Bot response detected")
-                    return True
-                await asyncio.sleep(0.5)
+            if await self._wait_for_new_message(before_message_id, timeout):
+                self._log("  ✓ Bot response detected")
+                return True
             
             self._log("  ⚠️ No bot response detected (timeout)")
             return False
@@ -443,6 +586,27 @@ class DiscordAutomation:
             self._log(f"  ⚠️ Error checking bot response: {e}", level="warning")
             return False
     
+    async def _wait_for_new_message(self, before_id: Optional[str], timeout: float) -> bool:
+        """
+        Wait until the last chat message id differs from before_id.
+        
+        The check runs inside the browser (re-evaluated on DOM mutations),
+        so detection does not depend on a Python-side polling interval.
+        """
+        try:
+            await self.page.wait_for_function(
+                """([sel, id]) => {
+                    const m = document.querySelectorAll(sel);
+                    return m.length > 0 && !!m[m.length - 1].id && m[m.length - 1].id !== id;
+                }""",
+                arg=[self.selectors.messages, before_id],
+                polling="mutation",
+                timeout=timeout * 1000
+            )
+            return True
+        except PlaywrightTimeoutError:
+            return False
+    
     async def is_direct_message(self) -> bool:
         """
         Check if current channel is a direct message (DM).
@@ -452,12 +616,14 @@ class DiscordAutomation:
         """
         try:
             self._ensure_connected()
-            current_url = self.page.url
             
-            # Discord DM URLs contain /@me/
-            # Example: https://discord.com/channels/@me/123456789
-            # Server channels: https://discord.com/channels/SERVER_ID/CHANNEL_ID
-            is_dm = "/@me/" in current_url
+            is_dm = self._is_dm_cache
+            if is_dm is None:
+                # Discord DM URLs contain /@me/
+                # Example: https://discord.com/channels/@me/123456789
+                # Server channels: https://discord.com/channels/SERVER_ID/CHANNEL_ID
+                is_dm = "/@me/" in self.page.url
+                self._is_dm_cache = is_dm
             
             if is_dm:
                 self._log("  ✓ Current channel is a Direct Message")
@@ -480,11 +646,10 @@ class DiscordAutomation:
             if not self.page:
                 return None
             
-            os.makedirs("screenshots", exist_ok=True)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"screenshots/{prefix}_{timestamp}.png"
+            filename = f"{self.SCREENSHOTS_DIR}/{prefix}_{time.strftime('%Y%m%d_%H%M%S')}.jpg"
             
-            await self.page.screenshot(path=filename, full_page=False)
+            # JPEG at reduced quality: debug-only, much cheaper to encode and transfer than PNG
+            await self.page.screenshot(path=filename, full_page=False, type="jpeg", quality=60)
             self._log(f"  📸 Debug screenshot saved: {filename}")
             return filename
             
@@ -493,8 +658,9 @@ class DiscordAutomation:
             return None
     
     def _log(self, message: str, level: str = "info") -> None:
-        """Log message using logger and print."""
-        print(message)
+        """Log message using logger; print synchronously when the logger has no handlers."""
+        if self._print_to_console:
+            print(message)
         log_method = getattr(self.logger, level, self.logger.info)
         log_method(message)
     
@@ -535,35 +701,61 @@ class DiscordAutomation:
                 self._log("  ❌ Redirected to login page - account not logged in!")
                 return False
             
-            # Wait for Discord app
-            matched = await self._wait_for_any_selector(self.selectors.app, timeout=10000)
-            if matched:
-                self._log(f"  ✓ Discord app initialized (found: {matched})")
-            else:
-                self._log("  ⚠️ Discord app container not found, checking page state...")
-                page_title = await self.page.title()
-                self._log(f"  ℹ️ Page title: {page_title}")
-            
-            # Wait for channel content
-            matched = await self._wait_for_any_selector(self.selectors.channel_content, timeout=8000)
-            if matched:
-                self._log(f"  ✓ Channel content loaded (found: {matched})")
-            else:
-                # Fallback: wait for any interactive element
-                self._log("  ⚠️ Standard content selectors not found, trying alternative...")
-                try:
-                    await self.page.wait_for_selector(
-                        'form, [contenteditable="true"], [role="textbox"]',
-                        timeout=10000
-                    )
-                    self._log("  ✓ Interactive element found")
-                except Exception:
-                    self._log("  ❌ No interactive content found")
-            
-            # Wait for message input
-            input_ready = await self._wait_for_message_input(timeout=15000)
-            
-            await asyncio.sleep(2)  # Wait for lazy-loaded elements
+            # Probe app container, channel content and message input concurrently
+            app_task = asyncio.create_task(
+                self._wait_for_any_selector(self.selectors.app, self.selectors.app_css, timeout=10000)
+            )
+            content_task = asyncio.create_task(
+                self._wait_for_any_selector(
+                    self.selectors.channel_content, self.selectors.channel_content_css, timeout=8000
+                )
+            )
+            try:
+                input_ready = await self._wait_for_message_input(timeout=15000)
+            
+                if input_ready:
+                    # Input is the signal we need - drop probes that are still running
+                    for task in (app_task, content_task):
+                        if not task.done():
+                            task.cancel()
+                    await asyncio.gather(app_task, content_task, return_exceptions=True)
+                    for task, label in ((app_task, "Discord app initialized"), (content_task, "Channel content loaded")):
+                        if not task.cancelled() and task.exception() is None and task.result():
+                            self._log(f"  ✓ {label} (found: {task.result()})")
+                else:
+                    matched_app, matched_content = await asyncio.gather(app_task, content_task)
+                    if matched_app:
+                        self._log(f"  ✓ Discord app initialized (found: {matched_app})")
+                    else:
+                        self._log("  ⚠️ Discord app container not found, checking page state...")
+                        page_title = await self.page.title()
+                        self._log(f"  ℹ️ Page title: {page_title}")
+                
+                    if matched_content:
+                        self._log(f"  ✓ Channel content loaded (found: {matched_content})")
+                    else:
+                        # Fallback: wait for any interactive element
+                        self._log("  ⚠️ Standard content selectors not found, trying alternative...")
+                        try:
+                            await self.page.wait_for_selector(
+                                'form, [contenteditable="true"], [role="textbox"]',
+                                timeout=10000
+                            )
+                            self._log("  ✓ Interactive element found")
+                        except Exception:
+                            self._log("  ❌ No interactive content found")
+            finally:
+                # Never leave probes running if input wait raised or we were cancelled
+                for task in (app_task, content_task):
+                    if not task.done():
+                        task.cancel()
+                await asyncio.gather(app_task, content_task, return_exceptions=True)
+            
+            # Wait for lazy-loaded elements (returns early once the network is idle)
+            try:
+                await self.page.wait_for_load_state("networkidle", timeout=2000)
+            except Exception:
+                pass
             
             # Final check
             textbox = await self.page.query_selector('div[role="textbox"]')
@@ -646,9 +838,9 @@ class DiscordAutomation:
                 return False
             
             # Focus input
-            await self._random_delay(200, 500)
+            await self._sleep_between(200, 500)
             await message_input.click()
-            await self._random_delay(500, 1000)
+            await self._sleep_between(500, 1000)
             self._log("  ✓ Message input focused")
             
             # Type command
@@ -656,12 +848,11 @@ class DiscordAutomation:
             await self._human_type(f"/{command}")
             
             # Wait for autocomplete
-            await asyncio.sleep(self.timing.autocomplete_wait)
-            await self._wait_for_autocomplete()
+            await self._wait_for_autocomplete(command)
             
             # Select command
             self._log("  ⏎ Selecting command...")
-            await self.page.keyboard.press("Enter")
+            await self._press("Enter")
             await asyncio.sleep(1.5)
             
             # Enter target user if specified
@@ -670,8 +861,8 @@ class DiscordAutomation:
             
             # Submit command
             self._log("  ⏎ Submitting command...")
-            await self._random_delay(500, 800)
-            await self.page.keyboard.press("Enter")
+            await self._sleep_between(500, 800)
+            await self._press("Enter")
             
             await asyncio.sleep(self.timing.command_submit_wait)
             
@@ -692,6 +883,7 @@ class DiscordAutomation:
         
         locator, selector = await self._find_element(
             self.selectors.message_input, 
+            self.selectors.message_input_css,
             timeout=min(timeout, 5000)
         )
         
@@ -703,13 +895,15 @@ class DiscordAutomation:
         await self.capture_screenshot("no_input_field")
         return None
     
-    async def _wait_for_autocomplete(self) -> bool:
-        """Wait for autocomplete popup to appear."""
+    async def _wait_for_autocomplete(self, typed: str) -> bool:
+        """Wait for autocomplete popup to appear and be filtered by the typed text."""
         try:
-            selector = ",".join(self.selectors.autocomplete)
-            await self.page.wait_for_selector(selector, timeout=6000)
+            await self.page.wait_for_function(
+                self._AUTOCOMPLETE_JS,
+                arg={"sel": self.selectors.autocomplete_css, "text": typed.lower()},
+                timeout=6500
+            )
             self._log("  ✓ Command autocomplete appeared")
-            await asyncio.sleep(0.5)
             return True
         except Exception:
             self._log("  ⚠️ No autocomplete detected, continuing...")
@@ -718,16 +912,15 @@ class DiscordAutomation:
     async def _enter_target_user(self, target_user: str) -> None:
         """Enter target user for the command."""
         self._log(f"  👤 Entering target user: {target_user}")
-        await self._random_delay(300, 600)
+        await self._sleep_between(300, 600)
         
         await self._human_type(target_user)
         self._log(f"  ⌨️ Typed: {target_user}")
         
-        await asyncio.sleep(self.timing.autocomplete_wait)
-        await self._wait_for_autocomplete()
+        await self._wait_for_autocomplete(target_user)
         
         self._log("  ⏎ Selecting user...")
-        await self.page.keyboard.press("Enter")
+        await self._press("Enter")
         await asyncio.sleep(1)
     
     async def _verify_command_response(self, command: str, before_message_id: Optional[str]) -> None:
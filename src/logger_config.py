@@ -2,21 +2,306 @@
 Logger Configuration
 Provides centralized logging configuration for the entire application
 """
+import atexit
+import functools
 import logging
+import os
+import queue
 import sys
-from datetime import datetime
+import threading
+import time
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener, RotatingFileHandler
 from typing import Optional, Dict
 
 # Default log settings
 DEFAULT_MAX_BYTES = 5 * 1024 * 1024  # 5 MB
 DEFAULT_BACKUP_COUNT = 3
+FILE_BUFFER_CAPACITY = 512  # Records held in memory before a file write
+FILE_FLUSH_INTERVAL = 1.0  # Seconds between periodic file flushes
+ROLLOVER_MARGIN = 256  # Bytes of headroom before the exact rollover check runs
+
+
+def _iov_max() -> int:
+    """Buffers allowed per os.writev call (POSIX only guarantees 16; Linux allows 1024)."""
+    try:
+        value = os.sysconf("SC_IOV_MAX")
+    except (AttributeError, ValueError, OSError):
+        return 16
+    return value if value > 0 else 16
+
+
+IOV_MAX = _iov_max()
+
+# Our formatters never use thread/process fields, so skip collecting them per record
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+
+class _FastFileFormatter(logging.Formatter):
+    """
+    Specialized formatter for '%(asctime)s - %(name)s - %(levelname)s - %(message)s'.
+    
+    Builds the line with an f-string and reuses the formatted timestamp within
+    the same second; records with exception or stack info use the stock path.
+    """
+    
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._ts_second = -1
+        self._ts_text = ""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        if record.exc_info or record.exc_text or record.stack_info:
+            return super().format(record)
+        
+        second = int(record.created)
+        if second != self._ts_second:
+            self._ts_second = second
+            self._ts_text = time.strftime(self.datefmt, self.converter(second))
+        return f"{self._ts_text} - {record.name} - {record.levelname} - {record.getMessage()}"
+
+
+# Formatters are shared by all handlers and built once
+_CONSOLE_FMT = logging.Formatter('%(message)s')
+_FILE_FMT = _FastFileFormatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
 
 # Cache for configured loggers to prevent duplicate handlers
 _configured_loggers: Dict[str, logging.Logger] = {}
 _log_file_path: Optional[Path] = None
 
+# Shared background listener: file records are only enqueued, formatting and I/O run on its thread.
+# Console output stays synchronous so it interleaves correctly with print().
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_listener: Optional[QueueListener] = None
+_console_handler: Optional[logging.Handler] = None
+_file_handler: Optional[logging.Handler] = None
+_file_buffer: Optional[MemoryHandler] = None
+_flush_stop: Optional[threading.Event] = None
+
+
+def _no_caller(*args, **kwargs):
+    """findCaller replacement that reports an unknown source without walking frames."""
+    return "(unknown file)", 0, "(unknown function)", None
+
+
+class FastRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that tracks the file size itself.
+    
+    The stock handler seeks, tells and formats the record a second time on
+    every emit to decide on rollover; here a running size estimate is kept
+    and the exact check only runs once the estimate is halfway to maxBytes,
+    resyncing the estimate each time so multi-byte text cannot overshoot.
+    Records are not flushed individually - call flush() after a batch.
+    
+    Rollover only renames the live file and reopens a fresh one; shifting
+    the numbered backups runs on a background worker so the logging
+    thread is not stalled by file renames.
+    """
+    
+    def __init__(self, *args, **kwargs) -> None:
+        self._rollover_seq = 0
+        self._rollover_queue: Optional["queue.SimpleQueue[Optional[str]]"] = None
+        self._rollover_worker: Optional[threading.Thread] = None
+        super().__init__(*args, **kwargs)
+    
+    def _open(self):
+        stream = super()._open()
+        try:
+            self._cached_size = os.fstat(stream.fileno()).st_size
+        except OSError:
+            self._cached_size = 0
+        self._check_at = 0  # Run the exact check (and set the next one) on the first record
+        return stream
+    
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.maxBytes <= 0:
+            return False
+        if self._cached_size + ROLLOVER_MARGIN < self._check_at:
+            return False
+        if super().shouldRollover(record):
+            return True
+        # Resync the estimate and look again halfway to the limit
+        self._cached_size = self.stream.tell()
+        self._check_at = (self._cached_size + self.maxBytes) // 2
+        return False
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            if self.shouldRollover(record):
+                self.doRollover()
+            self._cached_size += self._write(self.format(record) + self.terminator)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+    
+    def _write(self, msg: str) -> int:
+        """Write a formatted record and return its estimated size."""
+        self.stream.write(msg)
+        return len(msg)  # Characters, not bytes - shouldRollover corrects it near maxBytes
+    
+    def doRollover(self) -> None:
+        if self.backupCount <= 0:
+            super().doRollover()
+            return
+        
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        
+        if os.path.exists(self.baseFilename):
+            self._rollover_seq += 1
+            rolling = f"{self.baseFilename}.rolling{self._rollover_seq}"
+            os.replace(self.baseFilename, rolling)
+            self._enqueue_rollover(rolling)
+        
+        if not self.delay:
+            self.stream = self._open()
+    
+    def _enqueue_rollover(self, rolling: str) -> None:
+        """Hand a renamed log file to the background worker (started on first use)."""
+        if self._rollover_worker is None:
+            self._rollover_queue = queue.SimpleQueue()
+            self._rollover_worker = threading.Thread(
+                target=self._rollover_loop, name="log-rollover", daemon=True
+            )
+            self._rollover_worker.start()
+        self._rollover_queue.put(rolling)
+    
+    def _rollover_loop(self) -> None:
+        """Finalize rollovers in FIFO order so backup numbering stays consistent."""
+        while True:
+            rolling = self._rollover_queue.get()
+            if rolling is None:
+                return
+            try:
+                self._finalize_rollover(rolling)
+            except OSError:
+                pass
+    
+    def _finalize_rollover(self, rolling: str) -> None:
+        """Shift backups (.1 -> .2, ...) and move the renamed file into .1."""
+        for i in range(self.backupCount - 1, 0, -1):
+            sfn = self.rotation_filename(f"{self.baseFilename}.{i}")
+            dfn = self.rotation_filename(f"{self.baseFilename}.{i + 1}")
+            if os.path.exists(sfn):
+                os.replace(sfn, dfn)
+        
+        dfn = self.rotation_filename(self.baseFilename + ".1")
+        if os.path.exists(dfn):
+            os.remove(dfn)
+        self.rotate(rolling, dfn)
+    
+    def close(self) -> None:
+        if self._rollover_worker is not None:
+            self._rollover_queue.put(None)
+            self._rollover_worker.join()
+            self._rollover_worker = None
+        super().close()
+
+
+class _RawFdStream:
+    """
+    Minimal append-only stream over a raw file descriptor.
+    
+    Records are encoded once and collected as bytes; flush() hands them to
+    the kernel with a single os.write, bypassing TextIOWrapper's codec layer
+    and buffer lock.
+    """
+    
+    FLUSH_THRESHOLD = 64 * 1024
+    
+    def __init__(self, path: str, encoding: str, errors: Optional[str]) -> None:
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._encoding = encoding
+        self._errors = errors or "replace"
+        self._pending: list = []
+        self._pending_size = 0
+    
+    def fileno(self) -> int:
+        return self._fd
+    
+    def write(self, msg: str) -> int:
+        data = msg.encode(self._encoding, self._errors)
+        self._pending.append(data)
+        self._pending_size += len(data)
+        if self._pending_size >= self.FLUSH_THRESHOLD:
+            self.flush()
+        return len(data)
+    
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        pending, total = self._pending, self._pending_size
+        self._pending = []
+        self._pending_size = 0
+        
+        # One vectored syscall per batch (no join copy); fall back to os.write
+        written = 0
+        if hasattr(os, "writev"):
+            for i in range(0, len(pending), IOV_MAX):
+                chunk = pending[i:i + IOV_MAX]
+                n = os.writev(self._fd, chunk)
+                written += n
+                if n < sum(map(len, chunk)):
+                    break  # Short write: finish the remainder below
+        if written < total:
+            view = memoryview(b"".join(pending))[written:]
+            while view:
+                view = view[os.write(self._fd, view):]
+    
+    def seek(self, offset: int, whence: int = 0) -> int:
+        self.flush()
+        return os.lseek(self._fd, offset, whence)
+    
+    def tell(self) -> int:
+        return os.lseek(self._fd, 0, os.SEEK_CUR) + self._pending_size
+    
+    def close(self) -> None:
+        if self._fd < 0:
+            return
+        try:
+            self.flush()
+        finally:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class RawFdRotatingFileHandler(FastRotatingFileHandler):
+    """FastRotatingFileHandler writing pre-encoded bytes with os.write (POSIX)."""
+    
+    def _open(self):
+        stream = _RawFdStream(self.baseFilename, self.encoding or "utf-8", getattr(self, "errors", None))
+        try:
+            self._cached_size = os.fstat(stream.fileno()).st_size
+        except OSError:
+            self._cached_size = 0
+        self._check_at = 0
+        return stream
+    
+    def _write(self, msg: str) -> int:
+        return self.stream.write(msg)
+
+
+class _FileBuffer(MemoryHandler):
+    """MemoryHandler that flushes its target once per drained batch."""
+    
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            if self.target is not None and self.buffer:
+                super().flush()
+                self.target.flush()
+        finally:
+            self.release()
+
 
 def setup_logger(
     name: str = "RitualRPA",
@@ -42,7 +327,7 @@ def setup_logger(
     Returns:
         Configured logger instance
     """
-    global _log_file_path
+    global _log_file_path, _console_handler, _file_handler, _file_buffer
     
     # Return cached logger if already configured
     if name in _configured_loggers:
@@ -59,42 +344,53 @@ def setup_logger(
     # Prevent propagation to root logger (avoids duplicate output)
     logger.propagate = False
     
-    # Create formatters
-    console_formatter = logging.Formatter('%(message)s')
-    file_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    # Formatters don't use filename/lineno/funcName - skip the stack walk per record
+    logger.findCaller = _no_caller
     
-    # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
+    # Console handler (shared by all loggers, runs on the calling thread)
+    if _console_handler is None:
+        _console_handler = logging.StreamHandler(sys.stdout)
+        _console_handler.setLevel(logging.INFO)
+        _console_handler.setFormatter(_CONSOLE_FMT)
+    logger.addHandler(_console_handler)
     
-    # File handler with rotation (optional)
+    # File handler with rotation (optional, shared by all loggers)
     if log_to_file:
-        logs_dir = Path(log_dir)
-        logs_dir.mkdir(exist_ok=True)
-        
-        # Reuse existing log file for current session
-        if _log_file_path is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            _log_file_path = logs_dir / f"ritual_rpa_{timestamp}.log"
-        
-        file_handler = RotatingFileHandler(
-            _log_file_path,
-            maxBytes=max_bytes,
-            backupCount=backup_count,
-            encoding='utf-8'
-        )
-        file_handler.setLevel(logging.DEBUG)
-        file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
-        
-        # Only print log file message once (for first logger)
-        if len(_configured_loggers) == 0:
+        if _file_handler is None:
+            logs_dir = Path(log_dir)
+            logs_dir.mkdir(exist_ok=True)
+            
+            # Reuse existing log file for current session
+            if _log_file_path is None:
+                timestamp = time.strftime("%Y%m%d_%H%M%S")
+                _log_file_path = logs_dir / f"ritual_rpa_{timestamp}.log"
+            
+            # Raw fd writes on POSIX; buffered text stream elsewhere (Windows)
+            file_handler_cls = RawFdRotatingFileHandler if os.name == "posix" else FastRotatingFileHandler
+            _file_handler = file_handler_cls(
+                _log_file_path,
+                maxBytes=max_bytes,
+                backupCount=backup_count,
+                encoding='utf-8'
+            )
+            _file_handler.setLevel(logging.DEBUG)
+            _file_handler.setFormatter(_FILE_FMT)
+            
+            # Buffer records in memory; written in batches (on ERROR, when full, or periodically)
+            _file_buffer = _FileBuffer(
+                capacity=FILE_BUFFER_CAPACITY,
+                flushLevel=logging.ERROR,
+                target=_file_handler,
+                flushOnClose=True
+            )
+            _file_buffer.setLevel(logging.DEBUG)
+            _start_flusher()
+            _restart_listener()
+            
             print(f"\n📝 Logging to file: {_log_file_path}\n")
+        
+        # File records are only enqueued; the listener thread writes them
+        logger.addHandler(QueueHandler(_log_queue))
     
     # Cache the configured logger
     _configured_loggers[name] = logger
@@ -102,10 +398,58 @@ def setup_logger(
     return logger
 
 
+def _restart_listener() -> None:
+    """(Re)start the background listener feeding the shared file buffer."""
+    global _listener
+    
+    if _listener is not None:
+        _listener.stop()
+    
+    _listener = QueueListener(_log_queue, _file_buffer, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop_listener() -> None:
+    """Stop the background listener, draining any queued records to disk."""
+    global _listener, _flush_stop
+    
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    
+    if _flush_stop is not None:
+        _flush_stop.set()
+        _flush_stop = None
+    
+    if _file_buffer is not None:
+        _file_buffer.flush()
+
+
+def _start_flusher() -> None:
+    """Start a daemon thread that periodically flushes the file buffer."""
+    global _flush_stop
+    
+    stop = threading.Event()
+    
+    def _run() -> None:
+        while not stop.wait(FILE_FLUSH_INTERVAL):
+            if _file_buffer is not None:
+                _file_buffer.flush()
+    
+    threading.Thread(target=_run, name="log-flusher", daemon=True).start()
+    _flush_stop = stop
+
+
+atexit.register(_stop_listener)
+
+
+@functools.lru_cache(maxsize=None)
 def get_logger(name: str = "RitualRPA") -> logging.Logger:
     """
     Get existing logger or create a new one.
     
+    Memoized: repeat lookups are a single C-level cache hit.
+    
     Args:
         name: Logger name
         
@@ -126,15 +470,17 @@ def set_log_level(level: int, name: Optional[str] = None) -> None:
         name: Logger name (None = all configured loggers)
     """
     if name:
-        loggers = [logging.getLogger(name)] if name in _configured_loggers else []
-    else:
-        loggers = list(_configured_loggers.values())
+        if name in _configured_loggers:
+            logging.getLogger(name).setLevel(level)
+        return
     
-    for logger in loggers:
+    for logger in _configured_loggers.values():
         logger.setLevel(level)
-        for handler in logger.handlers:
-            if isinstance(handler, logging.FileHandler):
-                handler.setLevel(level)
+    
+    # The file handler is shared by every logger, so only a global change touches it
+    for handler in (_file_handler, _file_buffer):
+        if handler is not None:
+            handler.setLevel(level)
 
 
 def get_log_file_path() -> Optional[Path]:
@@ -144,10 +490,20 @@ def get_log_file_path() -> Optional[Path]:
 
 def reset_loggers() -> None:
     """Reset all loggers (useful for testing)."""
-    global _configured_loggers, _log_file_path
+    global _configured_loggers, _log_file_path, _console_handler, _file_handler, _file_buffer
+    
+    _stop_listener()
+    get_logger.cache_clear()
     
     for logger in _configured_loggers.values():
         logger.handlers.clear()
     
+    for handler in (_console_handler, _file_buffer, _file_handler):
+        if handler is not None:
+            handler.close()
+    
     _configured_loggers.clear()
+    _console_handler = None
+    _file_handler = None
+    _file_buffer = None
     _log_file_path = None
@@ -2,22 +2,130 @@
 State Manager
 Отслеживание прогресса, дневных лимитов и истории действий
 """
+import atexit
+import heapq
 import json
+import logging
 import os
 import random
-from datetime import datetime, date
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass, field, asdict
+import sys
+import threading
+import time
+from datetime import datetime, date, timedelta
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Any, Optional, Set, Tuple
+from dataclasses import dataclass, field
 from .logger_config import get_logger
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+def _dumps(obj: Any, pretty: bool = False) -> bytes:
+    """Serialize state to compact UTF-8 JSON bytes (orjson when available); pretty indents for debugging."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _loads(data: bytes) -> Any:
+    """Parse JSON bytes (orjson when available)."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps_line(obj: Any) -> bytes:
+    """Serialize one compact JSON line (for the append-only actions log)."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj) + b"\n"
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _write_atomic(path: str, payload: bytes) -> None:
+    """
+    Durably replace a file: one write to a temp file, one fsync, os.replace, then a directory fsync.
+    
+    A crash at any point leaves either the old or the new file, never a truncated one.
+    """
+    tmp_path = path + ".tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+    try:
+        view = memoryview(payload)
+        while view:
+            view = view[os.write(fd, view):]
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, path)
+    
+    # Make the rename itself durable (POSIX; Windows has no directory handles for this)
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
 logger = get_logger("StateManager")
 
 
+# [today's ISO date, epoch time of today's local midnight, epoch time of the next one]
+_today_cache: List[Any] = ["", 0.0, 0.0]
+
+
+def _today_iso(now: Optional[float] = None) -> str:
+    """Today's date as YYYY-MM-DD, recomputed only when the local day changes."""
+    if now is None:
+        now = time.time()
+    if not _today_cache[1] <= now < _today_cache[2]:
+        today = date.today()
+        _today_cache[0] = today.isoformat()
+        _today_cache[1] = time.mktime(today.timetuple())
+        _today_cache[2] = time.mktime((today + timedelta(days=1)).timetuple())
+    return _today_cache[0]
+
+
+# [epoch second, its HH:MM:SS local time string]
+_hms_cache: List[Any] = [-1, ""]
+
+
+def _now_hms(now: Optional[float] = None) -> str:
+    """Current local time as HH:MM:SS, formatted at most once per second."""
+    second = int(time.time() if now is None else now)
+    if second != _hms_cache[0]:
+        _hms_cache[0] = second
+        t = time.localtime(second)
+        _hms_cache[1] = f"{t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d}"
+    return _hms_cache[1]
+
+
+def _dbg(msg: str, *args: Any) -> None:
+    """Debug log that skips record creation entirely when DEBUG is disabled."""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(msg, *args)
+
+
+# Готовые прогресс-бары для ширины по умолчанию: _BARS[filled]
+_BAR_WIDTH = 20
+_BARS: Tuple[str, ...] = tuple("█" * i + "░" * (_BAR_WIDTH - i) for i in range(_BAR_WIDTH + 1))
+
+
 # ============================================================================
 # DATA CLASSES
 # ============================================================================
 
-@dataclass
+# __slots__ via dataclass(slots=True) on Python 3.10+; plain dataclasses on older versions
+_DATACLASS_SLOTS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class AccountProgress:
     """Прогресс аккаунта по получению bless/curse"""
     bless_received: int = 0
@@ -26,9 +134,22 @@ class AccountProgress:
     curse_given_today: int = 0
     last_action_date: str = ""
     last_action_time: str = ""
+    # Maintained by give_bless/give_curse/reset_daily; derived on construction
+    total_given_today: int = field(init=False, default=0)
+    
+    def __post_init__(self) -> None:
+        self.total_given_today = self.bless_given_today + self.curse_given_today
     
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        return {
+            "bless_received": self.bless_received,
+            "curse_received": self.curse_received,
+            "bless_given_today": self.bless_given_today,
+            "curse_given_today": self.curse_given_today,
+            "total_given_today": self.total_given_today,
+            "last_action_date": self.last_action_date,
+            "last_action_time": self.last_action_time
+        }
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'AccountProgress':
@@ -37,44 +158,74 @@ class AccountProgress:
             curse_received=data.get("curse_received", 0),
             bless_given_today=data.get("bless_given_today", 0),
             curse_given_today=data.get("curse_given_today", 0),
-            last_action_date=data.get("last_action_date", ""),
+            last_action_date=sys.intern(data.get("last_action_date", "")),
             last_action_time=data.get("last_action_time", "")
         )
     
-    @property
-    def total_given_today(self) -> int:
-        """Total actions given today."""
-        return self.bless_given_today + self.curse_given_today
+    def give_bless(self) -> None:
+        """Count one bless given today."""
+        self.bless_given_today += 1
+        self.total_given_today += 1
+    
+    def give_curse(self) -> None:
+        """Count one curse given today."""
+        self.curse_given_today += 1
+        self.total_given_today += 1
     
     def reset_daily(self) -> None:
         """Reset daily counters."""
         self.bless_given_today = 0
         self.curse_given_today = 0
+        self.total_given_today = 0
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class DailyStats:
-    """Статистика за день"""
+    """Статистика за день (сами действия хранятся в actions-YYYY-MM-DD.jsonl)"""
     date: str
-    accounts_processed: List[str] = field(default_factory=list)
+    accounts_processed: Set[str] = field(default_factory=set)
     total_bless: int = 0
     total_curse: int = 0
-    actions: List[Dict[str, Any]] = field(default_factory=list)
     
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        return {
+            "date": self.date,
+            "accounts_processed": sorted(self.accounts_processed),
+            "total_bless": self.total_bless,
+            "total_curse": self.total_curse
+        }
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'DailyStats':
         return cls(
-            date=data.get("date", ""),
-            accounts_processed=data.get("accounts_processed", []),
+            date=sys.intern(data.get("date", "")),
+            accounts_processed=set(data.get("accounts_processed", [])),
             total_bless=data.get("total_bless", 0),
-            total_curse=data.get("total_curse", 0),
-            actions=data.get("actions", [])
+            total_curse=data.get("total_curse", 0)
         )
 
 
+@dataclass(**_DATACLASS_SLOTS)
+class GiverView:
+    """Аккаунт-отправитель при построении пар (acc — исходный словарь аккаунта)"""
+    acc: Dict[str, Any]
+    name: str
+    remaining_today: int
+    progress: AccountProgress
+
+
+@dataclass(**_DATACLASS_SLOTS)
+class ReceiverView:
+    """Аккаунт-получатель и его потребности при построении пар"""
+    acc: Dict[str, Any]
+    name: str
+    needs_bless: bool
+    bless_remaining: int
+    needs_curse: bool
+    curse_remaining: int
+    total_needed: int
+
+
 # ============================================================================
 # STATE MANAGER
 # ============================================================================
@@ -91,15 +242,45 @@ class StateManager:
     
     DEFAULT_DAILY_LIMIT = 5
     DEFAULT_TARGET_COUNT = 10
+    FLUSH_INTERVAL = 1.0  # Minimum seconds between coalesced state writes
+    FLUSH_MAX_PENDING = 25  # Write anyway once this many actions are pending
+    DAILY_STATS_KEEP_DAYS = 30  # Older daily_stats move to daily-stats-archive.jsonl
     
-    def __init__(self, state_file: str = "state.json"):
+    def __init__(
+        self,
+        state_file: str = "state.json",
+        flush_interval_seconds: float = FLUSH_INTERVAL,
+        flush_max_pending: int = FLUSH_MAX_PENDING,
+        debug_pretty_state: bool = False
+    ):
         self.state_file = state_file
+        self.flush_interval_seconds = flush_interval_seconds
+        self.flush_max_pending = flush_max_pending
+        self.debug_pretty_state = debug_pretty_state  # Indented state.json for manual inspection
         self.accounts: Dict[str, AccountProgress] = {}
-        self.daily_stats: Dict[str, DailyStats] = {}
+        self.daily_stats: Dict[str, DailyStats] = {}  # Parsed days (today and any day touched since load)
+        self._raw_daily_stats: Dict[str, Dict[str, Any]] = {}  # Days as loaded, parsed on first access
         self.settings: Dict[str, Any] = self._default_settings()
+        self._refresh_settings_cache()
         self._dirty = False  # Track if state needs saving
+        self._last_flush = 0.0  # time.monotonic() of the last write
+        self._pending_writes = 0  # Actions recorded since the last write
+        self._actions_fp: Optional[BinaryIO] = None  # Append handle for the current actions log
+        self._actions_path = ""
+        self._actions_day = ""
+        self._actions_unsynced = 0  # Entries written to _actions_fp since the last fsync
+        self._daily_reset_date = ""  # Day for which _reset_daily_counters_if_needed already ran
+        self._journal_mark: Dict[str, Any] = {}  # {"date", "offset"}: actions log position covered by the snapshot
+        
+        # Background writer: snapshots are serialized on the caller, written on _writer
+        self._write_cond = threading.Condition()
+        self._pending_snapshot: Optional[Tuple[bytes, List[int]]] = None  # Latest unwritten (payload, log fds to fsync)
+        self._writer: Optional[threading.Thread] = None
+        self._writer_busy = False
+        self._writer_stop = False
         
         self._load_state()
+        atexit.register(self.close)
     
     def _default_settings(self) -> Dict[str, Any]:
         """Get default settings."""
@@ -110,6 +291,12 @@ class StateManager:
             "created_at": datetime.now().isoformat()
         }
     
+    def _refresh_settings_cache(self) -> None:
+        """Mirror the limits read on hot paths into attributes (after settings change)."""
+        self._daily_limit = self.settings.get("daily_limit_per_account", self.DEFAULT_DAILY_LIMIT)
+        self._target_bless = self.settings.get("target_bless", self.DEFAULT_TARGET_COUNT)
+        self._target_curse = self.settings.get("target_curse", self.DEFAULT_TARGET_COUNT)
+    
     # ========================================================================
     # STATE PERSISTENCE
     # ========================================================================
@@ -117,52 +304,82 @@ class StateManager:
     def _load_state(self) -> bool:
         """Загрузить состояние из файла."""
         if not os.path.exists(self.state_file):
-            logger.info(f"State file not found, creating new: {self.state_file}")
+            logger.info("State file not found, creating new: %s", self.state_file)
+            # Отметка журнала: после падения повторяются только действия, записанные после создания
+            today = self._get_today()
+            today_log = self._actions_log_path(today)
+            self._journal_mark = {
+                "date": today,
+                "offset": os.path.getsize(today_log) if os.path.exists(today_log) else 0
+            }
             self._save_state()
+            self.flush()
             return True
         
         try:
-            with open(self.state_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(self.state_file, 'rb') as f:
+                data = _loads(f.read())
             
             self.settings = data.get("settings", self._default_settings())
+            self._refresh_settings_cache()
             
             self.accounts = {
                 name: AccountProgress.from_dict(progress)
                 for name, progress in data.get("accounts", {}).items()
             }
             
-            self.daily_stats = {
-                day: DailyStats.from_dict(stats)
-                for day, stats in data.get("daily_stats", {}).items()
-            }
+            # Дни разбираются в DailyStats лениво, при первом обращении
+            self.daily_stats = {}
+            self._raw_daily_stats = data.get("daily_stats", {})
+            for day, stats in list(self._raw_daily_stats.items()):
+                if stats.get("actions"):
+                    self._migrate_inline_actions(day, stats["actions"])
+                    self._get_daily_stats(day)  # to_dict() drops the migrated actions
+            
+            # Дописываем действия из журнала, не попавшие в снимок (например, после падения)
+            if data.get("actions_log"):
+                self._journal_mark = data["actions_log"]
+                self._replay_actions_log()
             
             self._reset_daily_counters_if_needed()
             
-            logger.debug(f"State loaded: {len(self.accounts)} accounts, {len(self.daily_stats)} days")
+            _dbg("State loaded: %d accounts, %d days", len(self.accounts), len(self._raw_daily_stats))
             return True
             
         except Exception as e:
-            logger.error(f"Error loading state: {e}")
+            logger.error("Error loading state: %s", e)
             return False
     
     def _save_state(self) -> bool:
-        """Сохранить состояние в файл."""
+        """Сохранить состояние: снимок сериализуется здесь, на диск его пишет фоновый поток."""
         try:
+            # Журнал действий уходит в ОС сейчас; его fsync фоновый поток делает раньше снимка
+            log_fds = self._handoff_actions_log()
+            if self._actions_fp is not None:
+                self._journal_mark = {"date": self._actions_day, "offset": self._actions_fp.tell()}
+            
+            # Неразобранные дни пишутся как были; разобранные заменяют их на месте
+            daily_stats = dict(self._raw_daily_stats)
+            for day, stats in self.daily_stats.items():
+                daily_stats[day] = stats.to_dict()
+            
             data = {
                 "settings": self.settings,
                 "accounts": {name: acc.to_dict() for name, acc in self.accounts.items()},
-                "daily_stats": {day: stats.to_dict() for day, stats in self.daily_stats.items()},
+                "daily_stats": daily_stats,
                 "last_updated": datetime.now().isoformat()
             }
+            if self._journal_mark:
+                data["actions_log"] = self._journal_mark
             
-            with open(self.state_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            self._enqueue_snapshot(_dumps(data, self.debug_pretty_state), log_fds)
             
             self._dirty = False
+            self._last_flush = time.monotonic()
+            self._pending_writes = 0
             return True
         except Exception as e:
-            logger.error(f"Error saving state: {e}")
+            logger.error("Error saving state: %s", e)
             return False
     
     def save_if_dirty(self) -> None:
@@ -170,6 +387,204 @@ class StateManager:
         if self._dirty:
             self._save_state()
     
+    def maybe_flush(self, force: bool = False) -> None:
+        """Write pending changes if forced, the flush interval has passed, or enough actions are pending."""
+        if force:
+            self._save_state()
+        elif self._dirty and (
+            self._pending_writes >= self.flush_max_pending
+            or time.monotonic() - self._last_flush >= self.flush_interval_seconds
+        ):
+            self._save_state()
+    
+    def flush(self) -> None:
+        """Write any pending changes to disk now (waits for the background writer)."""
+        self.save_if_dirty()
+        with self._write_cond:
+            while self._pending_snapshot is not None or self._writer_busy:
+                self._write_cond.wait()
+    
+    def close(self) -> None:
+        """Flush pending state, stop the background writer and close the actions log."""
+        self.flush()
+        self._stop_writer()
+        if self._actions_fp is not None:
+            self._sync_actions_log()
+            self._actions_fp.close()
+            self._actions_fp = None
+            self._actions_path = ""
+            self._actions_day = ""
+    
+    # ========================================================================
+    # BACKGROUND WRITER
+    # ========================================================================
+    
+    def _enqueue_snapshot(self, payload: bytes, log_fds: List[int]) -> None:
+        """Hand a serialized snapshot to the writer thread; an unwritten older one is superseded."""
+        with self._write_cond:
+            if self._pending_snapshot is not None:
+                log_fds = self._pending_snapshot[1] + log_fds  # Its journal still needs the fsync
+            self._pending_snapshot = (payload, log_fds)
+            if self._writer is None:
+                self._writer_stop = False
+                self._writer = threading.Thread(target=self._writer_loop, name="StateWriter", daemon=True)
+                self._writer.start()
+            self._write_cond.notify_all()
+    
+    def _writer_loop(self) -> None:
+        """Write the latest snapshot until asked to stop."""
+        while True:
+            with self._write_cond:
+                while self._pending_snapshot is None and not self._writer_stop:
+                    self._write_cond.wait()
+                if self._pending_snapshot is None:
+                    return
+                payload, log_fds = self._pending_snapshot
+                self._pending_snapshot = None
+                self._writer_busy = True
+            try:
+                for fd in log_fds:
+                    os.fsync(fd)
+                _write_atomic(self.state_file, payload)
+            except Exception as e:
+                # Never let the writer die: flush()/close() wait on it
+                logger.error("Error saving state: %s", e)
+                self._dirty = True  # Retry with the next flush
+            finally:
+                for fd in log_fds:
+                    try:
+                        os.close(fd)
+                    except OSError:
+                        pass
+                with self._write_cond:
+                    self._writer_busy = False
+                    self._write_cond.notify_all()
+    
+    def _stop_writer(self) -> None:
+        """Let the writer finish queued work and exit."""
+        with self._write_cond:
+            writer = self._writer
+            if writer is None:
+                return
+            self._writer_stop = True
+            self._write_cond.notify_all()
+        writer.join()
+        self._writer = None
+    
+    # ========================================================================
+    # ACTIONS LOG (append-only JSONL, one file per day)
+    # ========================================================================
+    
+    def _actions_log_path(self, day: str) -> str:
+        """Path of the JSONL actions log for a day (next to the state file)."""
+        return os.path.join(os.path.dirname(self.state_file), f"actions-{day}.jsonl")
+    
+    def _append_action(self, day: str, entry: Dict[str, Any]) -> None:
+        """Append one action to the day's log through a cached, buffered file handle."""
+        path = self._actions_log_path(day)
+        if path != self._actions_path:
+            if self._actions_fp is not None:
+                self._sync_actions_log()
+                self._actions_fp.close()
+            self._actions_fp = open(path, 'ab', buffering=1 << 16)
+            self._actions_path = path
+            self._actions_day = day
+        self._actions_fp.write(_dumps_line(entry))
+        self._actions_unsynced += 1
+    
+    def _handoff_actions_log(self) -> List[int]:
+        """Flush buffered actions to the OS; return a dup'd fd for the writer to fsync, if any."""
+        if self._actions_fp is None or not self._actions_unsynced:
+            return []
+        self._actions_fp.flush()
+        self._actions_unsynced = 0
+        return [os.dup(self._actions_fp.fileno())]
+    
+    def _sync_actions_log(self) -> None:
+        """Flush and fsync buffered actions right away (day rollover and close)."""
+        if self._actions_fp is not None and self._actions_unsynced:
+            self._actions_fp.flush()
+            os.fsync(self._actions_fp.fileno())
+            self._actions_unsynced = 0
+    
+    def get_actions(self, day: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Stream recorded actions for a day (default: today) from its JSONL log."""
+        path = self._actions_log_path(day or self._get_today())
+        if path == self._actions_path and self._actions_fp is not None:
+            self._actions_fp.flush()
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield _loads(line)
+                except ValueError:
+                    logger.warning("Skipping malformed actions log entry in %s", path)
+    
+    def _migrate_inline_actions(self, day: str, actions: Any) -> None:
+        """Move actions stored inside an older state.json into the day's JSONL log."""
+        path = self._actions_log_path(day)
+        if not os.path.exists(path):
+            if isinstance(actions, list):
+                with open(path, 'wb') as f:
+                    for entry in actions:
+                        f.write(_dumps_line(entry))
+        self._dirty = True
+    
+    def _replay_actions_log(self) -> None:
+        """Re-apply actions logged after the snapshot position stored in _journal_mark."""
+        mark_day = self._journal_mark.get("date", "")
+        directory = os.path.dirname(self.state_file) or "."
+        days = sorted(
+            name[len("actions-"):-len(".jsonl")] for name in os.listdir(directory)
+            if name.startswith("actions-") and name.endswith(".jsonl")
+        )
+        replayed = 0
+        
+        for day in days:
+            if day < mark_day:
+                continue
+            path = self._actions_log_path(day)
+            with open(path, 'r+b') as f:
+                if day == mark_day:
+                    f.seek(self._journal_mark.get("offset", 0))
+                while True:
+                    start = f.tell()
+                    line = f.readline()
+                    if not line:
+                        break
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = _loads(line)
+                    except ValueError:
+                        entry = None
+                    if not line.endswith(b"\n"):
+                        # Torn tail from a crash mid-append: cut it so the next append starts on a fresh line
+                        if entry is None:
+                            logger.warning("Truncating torn actions log entry in %s", path)
+                            f.truncate(start)
+                            break
+                        f.write(b"\n")
+                    if entry is None:
+                        logger.warning("Skipping malformed actions log entry in %s", path)
+                        continue
+                    giver = self.accounts.get(entry["giver"])
+                    if giver is not None and giver.last_action_date and giver.last_action_date != day:
+                        giver.reset_daily()
+                    self._apply_action(
+                        day, entry["time"], entry["giver"], entry["receiver"],
+                        entry["action"], entry["success"]
+                    )
+                    replayed += 1
+            self._journal_mark = {"date": day, "offset": os.path.getsize(path)}
+        
+        if replayed:
+            logger.info("Replayed %d actions from the actions log", replayed)
+            self._dirty = True
+    
     # ========================================================================
     # HELPERS
     # ========================================================================
@@ -177,11 +592,15 @@ class StateManager:
     @staticmethod
     def _get_today() -> str:
         """Получить сегодняшнюю дату в формате YYYY-MM-DD."""
-        return date.today().isoformat()
+        return _today_iso()
     
     def _reset_daily_counters_if_needed(self) -> None:
         """Сбросить дневные счетчики если наступил новый день."""
         today = self._get_today()
+        if today == self._daily_reset_date:
+            return  # Уже проверено сегодня; record_action ставит только сегодняшнюю дату
+        self._daily_reset_date = today
+        self._archive_old_daily_stats(today)
         reset_count = 0
         
         for name, account in self.accounts.items():
@@ -190,24 +609,69 @@ class StateManager:
                 reset_count += 1
         
         if reset_count > 0:
-            logger.info(f"New day: reset daily counters for {reset_count} accounts")
+            logger.info("New day: reset daily counters for %d accounts", reset_count)
             self._dirty = True
     
     def _ensure_account_exists(self, account_name: str) -> AccountProgress:
         """Создать запись для аккаунта если не существует."""
         if account_name not in self.accounts:
             self.accounts[account_name] = AccountProgress()
-            logger.info(f"Created new account progress: {account_name}")
+            logger.info("Created new account progress: %s", account_name)
             self._dirty = True
         return self.accounts[account_name]
     
-    def _get_or_create_daily_stats(self) -> DailyStats:
-        """Получить или создать статистику за сегодня."""
-        today = self._get_today()
-        if today not in self.daily_stats:
-            self.daily_stats[today] = DailyStats(date=today)
+    def _bulk_ensure(self, account_names: Iterable[str]) -> None:
+        """Создать записи для всех отсутствующих аккаунтов за один проход."""
+        accounts = self.accounts
+        created = 0
+        for name in account_names:
+            if name not in accounts:
+                accounts[name] = AccountProgress()
+                created += 1
+        if created:
+            logger.info("Created progress for %d new accounts", created)
+            self._dirty = True
+    
+    def _archive_old_daily_stats(self, today: str) -> None:
+        """Move daily_stats older than DAILY_STATS_KEEP_DAYS out of state.json into the JSONL archive."""
+        cutoff = (date.fromisoformat(today) - timedelta(days=self.DAILY_STATS_KEEP_DAYS)).isoformat()
+        old_days = sorted(day for day in self._raw_daily_stats.keys() | self.daily_stats.keys() if day < cutoff)
+        if not old_days:
+            return
+        
+        path = os.path.join(os.path.dirname(self.state_file), "daily-stats-archive.jsonl")
+        try:
+            with open(path, 'ab') as f:
+                for day in old_days:
+                    stats = self.daily_stats.get(day)
+                    f.write(_dumps_line(stats.to_dict() if stats is not None else self._raw_daily_stats[day]))
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            logger.error("Error archiving daily stats: %s", e)
+            return
+        
+        for day in old_days:
+            self._raw_daily_stats.pop(day, None)
+            self.daily_stats.pop(day, None)
+        logger.info("Archived daily stats for %d days to %s", len(old_days), path)
+        self._dirty = True
+    
+    def _get_daily_stats(self, day: str) -> Optional[DailyStats]:
+        """Статистика за день; при первом обращении разбирается из загруженного state."""
+        stats = self.daily_stats.get(day)
+        if stats is None and day in self._raw_daily_stats:
+            stats = self.daily_stats[day] = DailyStats.from_dict(self._raw_daily_stats[day])
+        return stats
+    
+    def _get_or_create_daily_stats(self, day: Optional[str] = None) -> DailyStats:
+        """Получить или создать статистику за день (по умолчанию — за сегодня)."""
+        day = day or self._get_today()
+        stats = self._get_daily_stats(day)
+        if stats is None:
+            stats = self.daily_stats[day] = DailyStats(date=day)
             self._dirty = True
-        return self.daily_stats[today]
+        return stats
     
     # ========================================================================
     # ACCOUNT QUERIES
@@ -227,7 +691,7 @@ class StateManager:
         self._reset_daily_counters_if_needed()
         
         account = self._ensure_account_exists(account_name)
-        daily_limit = self.settings["daily_limit_per_account"]
+        daily_limit = self._daily_limit
         
         if account.total_given_today >= daily_limit:
             return False, f"Daily limit reached ({account.total_given_today}/{daily_limit})"
@@ -238,21 +702,21 @@ class StateManager:
     def needs_bless(self, account_name: str) -> Tuple[bool, int]:
         """Проверить нужны ли ещё bless аккаунту."""
         account = self._ensure_account_exists(account_name)
-        target = self.settings["target_bless"]
+        target = self._target_bless
         remaining = max(0, target - account.bless_received)
         return remaining > 0, remaining
     
     def needs_curse(self, account_name: str) -> Tuple[bool, int]:
         """Проверить нужны ли ещё curse аккаунту."""
         account = self._ensure_account_exists(account_name)
-        target = self.settings["target_curse"]
+        target = self._target_curse
         remaining = max(0, target - account.curse_received)
         return remaining > 0, remaining
     
     def get_remaining_today(self, account_name: str) -> int:
         """Get remaining actions for today."""
         account = self._ensure_account_exists(account_name)
-        daily_limit = self.settings["daily_limit_per_account"]
+        daily_limit = self._daily_limit
         return max(0, daily_limit - account.total_given_today)
     
     # ========================================================================
@@ -275,45 +739,63 @@ class StateManager:
             action_type: "bless" или "curse"
             success: Успешно ли выполнено
         """
+        # Одно чтение часов на дату и время, чтобы они не разошлись в полночь
+        now = time.time()
+        now_hms = _now_hms(now)
+        today = _today_iso(now)
+        
+        self._apply_action(today, now_hms, giver_name, receiver_name, action_type, success)
+        
+        try:
+            self._append_action(today, {
+                "time": now_hms,
+                "giver": giver_name,
+                "receiver": receiver_name,
+                "action": action_type,
+                "success": success
+            })
+        except OSError as e:
+            logger.error("Error writing actions log: %s", e)
+        
+        self._dirty = True
+        self._pending_writes += 1
+        self.maybe_flush()
+        
+        logger.info("Recorded: %s -> %s -> %s (success=%s)", giver_name, action_type, receiver_name, success)
+    
+    def _apply_action(
+        self,
+        day: str,
+        time_hms: str,
+        giver_name: str,
+        receiver_name: str,
+        action_type: str,
+        success: bool
+    ) -> None:
+        """Apply one action to the in-memory counters (shared with actions log replay)."""
         giver = self._ensure_account_exists(giver_name)
         receiver = self._ensure_account_exists(receiver_name)
         
-        now = datetime.now()
-        today = self._get_today()
-        
         if success:
             if action_type == "bless":
-                giver.bless_given_today += 1
+                giver.give_bless()
                 receiver.bless_received += 1
             elif action_type == "curse":
-                giver.curse_given_today += 1
+                giver.give_curse()
                 receiver.curse_received += 1
         
-        giver.last_action_date = today
-        giver.last_action_time = now.strftime("%H:%M:%S")
+        giver.last_action_date = day
+        giver.last_action_time = time_hms
         
         # Update daily stats
-        daily = self._get_or_create_daily_stats()
-        if giver_name not in daily.accounts_processed:
-            daily.accounts_processed.append(giver_name)
+        daily = self._get_or_create_daily_stats(day)
+        daily.accounts_processed.add(giver_name)
         
         if success:
             if action_type == "bless":
                 daily.total_bless += 1
             elif action_type == "curse":
                 daily.total_curse += 1
-        
-        daily.actions.append({
-            "time": now.strftime("%H:%M:%S"),
-            "giver": giver_name,
-            "receiver": receiver_name,
-            "action": action_type,
-            "success": success
-        })
-        
-        self._save_state()
-        
-        logger.info(f"Recorded: {giver_name} -> {action_type} -> {receiver_name} (success={success})")
     
     # ========================================================================
     # PAIR GENERATION
@@ -338,19 +820,47 @@ class StateManager:
             Список пар действий в случайном порядке
         """
         # Initialize all accounts
-        for acc in accounts:
-            self._ensure_account_exists(acc["name"])
+        self._bulk_ensure(acc["name"] for acc in accounts)
+        self._reset_daily_counters_if_needed()
         
         self.save_if_dirty()
         
+        # Быстрый выход: все цели выполнены или все лимиты на сегодня исчерпаны
+        target_bless = self._target_bless
+        target_curse = self._target_curse
+        daily_limit = self._daily_limit
+        any_needs = any_can_give = False
+        for acc in accounts:
+            progress = self.accounts[acc["name"]]
+            if progress.bless_received < target_bless or progress.curse_received < target_curse:
+                any_needs = True
+            if progress.total_given_today < daily_limit:
+                any_can_give = True
+            if any_needs and any_can_give:
+                break
+        if not any_can_give:
+            logger.warning("No accounts available to give actions today")
+            return []
+        if not any_needs:
+            logger.info("All accounts have reached their targets!")
+            return []
+        
+        # Блокировки проверяем один раз на весь вызов
+        blocked: Set[str] = set()
+        if account_mgr:
+            blocked = {
+                acc.get("name", "") for acc in accounts
+                if account_mgr.is_account_blocked(acc.get("name", ""), acc.get("adspower_id", ""))
+            }
+        
         # Find available givers (исключая заблокированные)
-        available_givers = self._get_available_givers(accounts, account_mgr)
+        available_givers = self._get_available_givers(accounts, blocked)
         if not available_givers:
             logger.warning("No accounts available to give actions today")
             return []
         
         # Find accounts needing bless/curse (исключая заблокированные)
-        needs_list = self._get_accounts_needing_actions(accounts, account_mgr)
+        needs_list = self._get_accounts_needing_actions(accounts, blocked)
         if not needs_list:
             logger.info("All accounts have reached their targets!")
             return []
@@ -365,74 +875,85 @@ class StateManager:
         for i, pair in enumerate(pairs, 1):
             pair["index"] = i
         
-        logger.info(f"Planned {len(pairs)} actions for today (randomized order)")
+        logger.info("Planned %d actions for today (randomized order)", len(pairs))
         return pairs
     
     def _get_available_givers(
         self, 
         accounts: List[Dict[str, Any]], 
-        account_mgr: Optional[Any] = None
-    ) -> List[Dict[str, Any]]:
-        """Get list of accounts that can give actions today (excluding blocked)."""
+        blocked: Set[str] = frozenset()
+    ) -> List[GiverView]:
+        """Get list of accounts that can give actions today (excluding blocked).
+        
+        Expects accounts to exist and daily counters to be current (see get_optimal_pairs).
+        """
         available = []
-        daily_limit = self.settings["daily_limit_per_account"]
+        daily_limit = self._daily_limit
+        progress_by_name = self.accounts
         
         for acc in accounts:
             account_name = acc.get("name", "")
-            adspower_id = acc.get("adspower_id", "")
             
             # Проверяем, не заблокирован ли аккаунт
-            if account_mgr and account_mgr.is_account_blocked(account_name, adspower_id):
+            if account_name in blocked:
                 continue
             
-            can_give, _ = self.can_give_action_today(account_name)
-            if can_give:
-                progress = self.accounts[account_name]
-                available.append({
-                    **acc,
-                    "remaining_today": daily_limit - progress.total_given_today,
-                    "progress": progress
-                })
+            progress = progress_by_name[account_name]
+            remaining_today = daily_limit - progress.total_given_today
+            if remaining_today > 0:
+                available.append(GiverView(
+                    acc=acc,
+                    name=account_name,
+                    remaining_today=remaining_today,
+                    progress=progress
+                ))
         
         return available
     
     def _get_accounts_needing_actions(
         self, 
         accounts: List[Dict[str, Any]], 
-        account_mgr: Optional[Any] = None
-    ) -> List[Dict[str, Any]]:
-        """Get list of accounts that need bless/curse (excluding blocked)."""
+        blocked: Set[str] = frozenset()
+    ) -> List[ReceiverView]:
+        """Get list of accounts that need bless/curse (excluding blocked).
+        
+        Expects accounts to exist (see get_optimal_pairs).
+        """
         needs_list = []
+        target_bless = self._target_bless
+        target_curse = self._target_curse
+        progress_by_name = self.accounts
         
         for acc in accounts:
             account_name = acc.get("name", "")
-            adspower_id = acc.get("adspower_id", "")
             
             # Пропускаем заблокированные аккаунты
-            if account_mgr and account_mgr.is_account_blocked(account_name, adspower_id):
+            if account_name in blocked:
                 continue
             
-            needs_bless, bless_remaining = self.needs_bless(account_name)
-            needs_curse, curse_remaining = self.needs_curse(account_name)
+            progress = progress_by_name[account_name]
+            bless_remaining = max(0, target_bless - progress.bless_received)
+            curse_remaining = max(0, target_curse - progress.curse_received)
             
-            if needs_bless or needs_curse:
-                needs_list.append({
-                    **acc,
-                    "needs_bless": needs_bless,
-                    "bless_remaining": bless_remaining,
-                    "needs_curse": needs_curse,
-                    "curse_remaining": curse_remaining,
-                    "total_needed": bless_remaining + curse_remaining
-                })
+            if bless_remaining or curse_remaining:
+                needs_list.append(ReceiverView(
+                    acc=acc,
+                    name=account_name,
+                    needs_bless=bless_remaining > 0,
+                    bless_remaining=bless_remaining,
+                    needs_curse=curse_remaining > 0,
+                    curse_remaining=curse_remaining,
+                    total_needed=bless_remaining + curse_remaining
+                ))
         
         # Sort by priority (most needed first)
-        needs_list.sort(key=lambda x: x["total_needed"], reverse=True)
+        needs_list.sort(key=lambda x: x.total_needed, reverse=True)
         return needs_list
     
     def _build_pairs_even(
         self, 
-        givers: List[Dict[str, Any]], 
-        receivers: List[Dict[str, Any]], 
+        givers: List[GiverView], 
+        receivers: List[ReceiverView], 
         max_actions: int
     ) -> List[Dict[str, Any]]:
         """
@@ -440,9 +961,10 @@ class StateManager:
         
         Алгоритм:
         1. Создаём список всех нужных действий (bless/curse для каждого receiver)
-        2. Сортируем по приоритету (больше нужных = выше приоритет)
+        2. Отбираем max_actions самых приоритетных (больше нужных = выше приоритет)
         3. Распределяем действия равномерно между доступными givers
-        4. Используем round-robin с учётом количества использований для равномерности
+        4. Берём giver с наименьшим числом использований, при равенстве -
+           с наибольшим запасом действий (min-heap)
         
         Args:
             givers: Список доступных аккаунтов-отправителей
@@ -458,153 +980,124 @@ class StateManager:
         # Создаём список всех нужных действий
         action_queue = []
         for receiver in receivers:
-            if receiver.get("needs_bless", False):
+            if receiver.needs_bless:
                 action_queue.append({
                     "receiver": receiver,
                     "action": "bless",
-                    "priority": receiver.get("bless_remaining", 0)
+                    "priority": receiver.bless_remaining
                 })
-            if receiver.get("needs_curse", False):
+            if receiver.needs_curse:
                 action_queue.append({
                     "receiver": receiver,
                     "action": "curse",
-                    "priority": receiver.get("curse_remaining", 0)
+                    "priority": receiver.curse_remaining
                 })
         
-        # Сортируем по приоритету (больше нужных = выше приоритет)
-        action_queue.sort(key=lambda x: x["priority"], reverse=True)
-        
-        # Ограничиваем количество действий
-        action_queue = action_queue[:max_actions]
+        # Берём max_actions самых приоритетных (больше нужных = выше приоритет);
+        # nlargest равносилен sorted(..., reverse=True)[:n], но без полной сортировки
+        action_queue = heapq.nlargest(max_actions, action_queue, key=lambda x: x["priority"])
         
-        # Распределяем действия равномерно между givers
+        # Распределяем действия равномерно между givers:
+        # куча (использований, -оставшихся действий, индекс giver) отдаёт наименее
+        # загруженного, а среди равных - с наибольшим запасом, чтобы он не простаивал
         pairs = []
-        giver_usage = {i: 0 for i in range(len(givers))}  # Счётчик использований каждого giver
-        giver_idx = 0
+        append_pair = pairs.append
+        pair_index = 0
+        heap = [(0, -giver.remaining_today, i) for i, giver in enumerate(givers)]
+        heapq.heapify(heap)
+        heappop = heapq.heappop
+        heappush = heapq.heappush
         
         for action_item in action_queue:
             receiver = action_item["receiver"]
             action_type = action_item["action"]
+            receiver_name = receiver.name
             
             # Находим доступного giver (не receiver, с оставшимися действиями)
             giver = None
-            attempts = 0
+            skipped = []
             
-            while attempts < len(givers):
-                candidate = givers[giver_idx]
+            while heap:
+                entry = heappop(heap)
+                usage, _, idx = entry
+                candidate = givers[idx]
                 
-                # Проверяем условия
-                if (candidate["name"] != receiver["name"] and 
-                    candidate["remaining_today"] > 0):
-                    giver = candidate
-                    break
+                # Исчерпавшие лимит givers в кучу больше не возвращаются
+                if candidate.remaining_today <= 0:
+                    continue
                 
-                giver_idx = (giver_idx + 1) % len(givers)
-                attempts += 1
+                if candidate.name == receiver_name:
+                    skipped.append(entry)
+                    continue
+                
+                giver = candidate
+                break
+            
+            for entry in skipped:
+                heappush(heap, entry)
             
             if not giver:
                 # Нет доступных givers - пропускаем это действие
                 continue
             
             # Создаём пару
-            pairs.append({
-                "giver": giver,
-                "receiver": receiver,
+            pair_index += 1
+            append_pair({
+                "giver": giver.acc,
+                "receiver": receiver.acc,
                 "action": action_type,
-                "index": len(pairs) + 1
+                "index": pair_index
             })
             
             # Обновляем счётчики
-            giver["remaining_today"] -= 1
-            giver_usage[givers.index(giver)] += 1
-            
-            # Переходим к следующему giver для равномерного распределения
-            # Используем round-robin, но учитываем количество оставшихся действий
-            giver_idx = self._find_next_giver_idx(givers, giver_idx, giver_usage)
+            giver.remaining_today -= 1
+            heappush(heap, (usage + 1, -giver.remaining_today, idx))
         
         # Добавляем общее количество
         for pair in pairs:
-            pair["total"] = len(pairs)
+            pair["total"] = pair_index
         
         return pairs
     
-    def _find_next_giver_idx(
-        self, 
-        givers: List[Dict[str, Any]], 
-        current_idx: int,
-        usage: Dict[int, int]
-    ) -> int:
-        """
-        Найти индекс следующего giver для равномерного распределения.
-        Выбирает giver с наименьшим количеством использований.
-        """
-        if not givers:
-            return 0
-        
-        # Находим минимальное количество использований
-        min_usage = min(usage.values()) if usage else 0
-        
-        # Ищем giver с минимальным использованием, начиная со следующего
-        for i in range(len(givers)):
-            idx = (current_idx + 1 + i) % len(givers)
-            if usage.get(idx, 0) == min_usage and givers[idx]["remaining_today"] > 0:
-                return idx
-        
-        # Если не нашли, просто переходим к следующему
-        return (current_idx + 1) % len(givers)
-    
-    def _find_available_giver(
-        self, 
-        givers: List[Dict[str, Any]], 
-        receiver_name: str, 
-        start_idx: int
-    ) -> Optional[Dict[str, Any]]:
-        """Find an available giver that is not the receiver."""
-        for i in range(len(givers)):
-            idx = (start_idx + i) % len(givers)
-            giver = givers[idx]
-            
-            if giver["name"] != receiver_name and giver["remaining_today"] > 0:
-                return giver
-        
-        return None
-    
     # ========================================================================
     # REPORTING
     # ========================================================================
     
     def print_progress_report(self) -> None:
-        """Вывести отчёт о прогрессе всех аккаунтов."""
-        target_bless = self.settings["target_bless"]
-        target_curse = self.settings["target_curse"]
-        daily_limit = self.settings["daily_limit_per_account"]
-        
-        print("\n" + "="*70)
-        print("📊 ПРОГРЕСС АККАУНТОВ")
-        print("="*70)
-        print(f"🎯 Цель: {target_bless} bless + {target_curse} curse на каждом")
-        print(f"📅 Дневной лимит: {daily_limit} действий с аккаунта")
-        print("-"*70)
+        """Вывести отчёт о прогрессе всех аккаунтов (одной записью в stdout)."""
+        target_bless = self._target_bless
+        target_curse = self._target_curse
+        daily_limit = self._daily_limit
         
-        if not self.accounts:
-            print("  Нет данных об аккаунтах")
-            print("="*70 + "\n")
-            return
+        parts = [
+            "\n" + "="*70,
+            "📊 ПРОГРЕСС АККАУНТОВ",
+            "="*70,
+            f"🎯 Цель: {target_bless} bless + {target_curse} curse на каждом",
+            f"📅 Дневной лимит: {daily_limit} действий с аккаунта",
+            "-"*70,
+        ]
         
-        for name, progress in sorted(self.accounts.items()):
-            self._print_account_progress(name, progress, target_bless, target_curse, daily_limit)
+        if not self.accounts:
+            parts.append("  Нет данных об аккаунтах")
+            parts.append("="*70 + "\n")
+        else:
+            for name, progress in sorted(self.accounts.items()):
+                parts.append(self._format_account_progress(name, progress, target_bless, target_curse, daily_limit))
+            parts.append(self._format_total_progress(target_bless, target_curse))
         
-        self._print_total_progress(target_bless, target_curse)
+        sys.stdout.write("\n".join(parts) + "\n")
+        sys.stdout.flush()
     
-    def _print_account_progress(
+    def _format_account_progress(
         self, 
         name: str, 
         progress: AccountProgress,
         target_bless: int,
         target_curse: int,
         daily_limit: int
-    ) -> None:
-        """Print progress for single account."""
+    ) -> str:
+        """Format progress lines for single account."""
         bless_pct = (progress.bless_received / target_bless * 100) if target_bless > 0 else 100
         curse_pct = (progress.curse_received / target_curse * 100) if target_curse > 0 else 100
         
@@ -614,36 +1107,44 @@ class StateManager:
         daily_remaining = daily_limit - progress.total_given_today
         status = "✅" if (bless_pct >= 100 and curse_pct >= 100) else "🔄"
         
-        print(f"\n{status} {name}:")
-        print(f"   Bless: {bless_bar} {progress.bless_received}/{target_bless}")
-        print(f"   Curse: {curse_bar} {progress.curse_received}/{target_curse}")
-        print(f"   Сегодня выдано: {progress.total_given_today}/{daily_limit} (осталось: {daily_remaining})")
+        text = (
+            f"\n{status} {name}:\n"
+            f"   Bless: {bless_bar} {progress.bless_received}/{target_bless}\n"
+            f"   Curse: {curse_bar} {progress.curse_received}/{target_curse}\n"
+            f"   Сегодня выдано: {progress.total_given_today}/{daily_limit} (осталось: {daily_remaining})"
+        )
         
         if progress.last_action_time:
-            print(f"   Последнее действие: {progress.last_action_date} {progress.last_action_time}")
+            text += f"\n   Последнее действие: {progress.last_action_date} {progress.last_action_time}"
+        return text
     
-    def _print_total_progress(self, target_bless: int, target_curse: int) -> None:
-        """Print total progress summary."""
-        total_bless = sum(acc.bless_received for acc in self.accounts.values())
-        total_curse = sum(acc.curse_received for acc in self.accounts.values())
+    def _format_total_progress(self, target_bless: int, target_curse: int) -> str:
+        """Format total progress summary."""
+        total_bless = total_curse = 0
+        for acc in self.accounts.values():
+            total_bless += acc.bless_received
+            total_curse += acc.curse_received
         total_target = len(self.accounts) * (target_bless + target_curse)
         total_done = total_bless + total_curse
         
         pct = (total_done / total_target * 100) if total_target > 0 else 0
         
-        print("\n" + "="*70)
-        print(f"📈 Общий прогресс: {total_done}/{total_target} ({pct:.1f}%)")
-        print("="*70 + "\n")
+        return (
+            "\n" + "="*70 + "\n"
+            f"📈 Общий прогресс: {total_done}/{total_target} ({pct:.1f}%)\n"
+            + "="*70 + "\n"
+        )
     
     @staticmethod
     def _progress_bar(current: int, target: int, width: int = 20) -> str:
         """Создать текстовый прогресс-бар."""
         if target == 0:
-            return "█" * width
-        
-        filled = int(width * min(current / target, 1.0))
-        empty = width - filled
-        return "█" * filled + "░" * empty
+            filled = width
+        else:
+            filled = int(width * max(0.0, min(current / target, 1.0)))
+        if width == _BAR_WIDTH:
+            return _BARS[filled]
+        return "█" * filled + "░" * (width - filled)
     
     # ========================================================================
     # SUMMARY
@@ -651,13 +1152,13 @@ class StateManager:
     
     def get_summary(self) -> Dict[str, Any]:
         """Получить сводку состояния."""
-        target_bless = self.settings["target_bless"]
-        target_curse = self.settings["target_curse"]
+        target_bless = self._target_bless
+        target_curse = self._target_curse
         
-        completed = sum(
-            1 for p in self.accounts.values()
-            if p.bless_received >= target_bless and p.curse_received >= target_curse
-        )
+        completed = 0
+        for p in self.accounts.values():
+            if p.bless_received >= target_bless and p.curse_received >= target_curse:
+                completed += 1
         
         return {
             "total_accounts": len(self.accounts),
@@ -665,13 +1166,15 @@ class StateManager:
             "in_progress": len(self.accounts) - completed,
             "target_bless": target_bless,
             "target_curse": target_curse,
-            "daily_limit": self.settings["daily_limit_per_account"]
+            "daily_limit": self._daily_limit
         }
     
     def update_settings(self, **kwargs) -> None:
         """Обновить настройки."""
         for key, value in kwargs.items():
-            if key in self.settings:
+            if key in self.settings and self.settings[key] != value:
                 self.settings[key] = value
-                logger.info(f"Setting updated: {key} = {value}")
-        self._save_state()
+                self._dirty = True
+                logger.info("Setting updated: %s = %s", key, value)
+        self._refresh_settings_cache()
+        self.save_if_dirty()